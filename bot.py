@@ -1,16 +1,25 @@
 import asyncio
 import logging
 import argparse
+import signal
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums.parse_mode import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from aiohttp import web
 
+try:
+    import uvloop
+except ImportError:
+    # uvloop is not available on Windows
+    uvloop = None
+
 from config import config, Config
 from handlers import register_handlers
 from webhook_handlers import handle_payment_webhook
+from zenithionpay_client import close_session
 
 
 # TODO: make setting log file path
@@ -33,6 +42,11 @@ def setup_logging(*, log_to_file: bool) -> None:
 async def main(*, log_to_file: bool) -> None:
     setup_logging(log_to_file=log_to_file)
 
+    # without a secret aiogram accepts any POST to the webhook path as a Telegram update
+    if config.telegram_webhook_url and not config.telegram_webhook_secret:
+        logging.error("TELEGRAM_WEBHOOK_SECRET is required when TELEGRAM_WEBHOOK_URL is set")
+        raise SystemExit(1)
+
     bot = Bot(token=config.bot_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
     dp = Dispatcher(storage=MemoryStorage())
 
@@ -42,6 +56,25 @@ async def main(*, log_to_file: bool) -> None:
     app = web.Application()
     app.router.add_post("/webhook", handle_payment_webhook,)
 
+    # Outbound HTTP sessions are closed together with the web server
+    async def close_http_sessions(_: web.Application) -> None:
+        await bot.session.close()
+        await close_session()
+
+    app.on_shutdown.append(close_http_sessions)
+
+    if config.telegram_webhook_url:
+        # Telegram updates are served by the same app as payment webhooks
+        # updates are handled inside the request, so Telegram's max_connections bounds
+        # concurrent handlers the way tasks_concurrency_limit does for polling
+        SimpleRequestHandler(
+            dispatcher=dp,
+            bot=bot,
+            handle_in_background=False,
+            secret_token=config.telegram_webhook_secret,
+        ).register(app, path=config.telegram_webhook_path)
+        setup_application(app, dp, bot=bot)
+
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, Config.web_server_host, Config.web_server_port)
@@ -50,12 +83,43 @@ async def main(*, log_to_file: bool) -> None:
     await site.start()
     logging.info(f"The web server is running on {Config.web_server_host}:{Config.web_server_port}")
 
-    logging.info("Starting bot polling...")
     try:
-        await dp.start_polling(bot)
+        if config.telegram_webhook_url:
+            webhook_url = config.telegram_webhook_url.rstrip("/") + config.telegram_webhook_path
+            await bot.set_webhook(
+                webhook_url,
+                secret_token=config.telegram_webhook_secret,
+                allowed_updates=dp.resolve_used_update_types(),
+                # Telegram accepts 1-100 simultaneous webhook connections
+                max_connections=max(1, min(config.polling_tasks_limit, 100)),
+            )
+            logging.info(f"Receiving bot updates via webhook {webhook_url}")
+
+            stop_event = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                try:
+                    loop.add_signal_handler(sig, stop_event.set)
+                except NotImplementedError:
+                    # no loop signal handlers on Windows, Ctrl+C still interrupts the wait
+                    pass
+            await stop_event.wait()
+            logging.info("Bot stopped by signal")
+        else:
+            # getUpdates is rejected while a webhook is set
+            await bot.delete_webhook()
+            logging.info("Starting bot polling...")
+            await dp.start_polling(
+                bot,
+                polling_timeout=30,
+                handle_as_tasks=True,
+                tasks_concurrency_limit=config.polling_tasks_limit,
+            )
     except Exception as e:
-        logging.error("Error while polling: %s", e)
+        logging.error("Error while receiving updates: %s", e)
         raise
+    finally:
+        await runner.cleanup()
 
 
 if __name__ == "__main__":
@@ -68,6 +132,7 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     try:
-        asyncio.run(main(log_to_file=args.log_to_file))
+        run = uvloop.run if uvloop is not None else asyncio.run
+        run(main(log_to_file=args.log_to_file))
     except KeyboardInterrupt:
         logging.info("Bot stopped by keyboard interrupt (Ctrl+C)")
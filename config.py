@@ -1,7 +1,9 @@
-import json
+import logging
 import os
+from pathlib import Path
 from typing import Optional
 
+import orjson
 from dotenv import load_dotenv
 
 
@@ -12,35 +14,68 @@ class Config:
     bot_token: str = os.getenv("BOT_TOKEN", "")
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
     user_tokens_file: str = os.getenv("USER_TOKENS_FILE", "api_tokens.json")
-    skip_verify: str = bool(os.getenv("SKIP_VERIFY", False))
+    skip_verify: bool = os.getenv("SKIP_VERIFY", "").lower() in {"1", "true", "yes"}
     web_server_host: str = os.getenv("WEB_SERVER_HOST", "0.0.0.0")
-    web_server_port: int = os.getenv("WEB_SERVER_PORT", 8080)
+    web_server_port: int = int(os.getenv("WEB_SERVER_PORT", "8080"))
     webhooks_api_key: str = os.getenv("WEBHOOK_API_KEY")
+    # Public base URL of this server; when set, Telegram pushes updates to it instead of polling
+    telegram_webhook_url: str = os.getenv("TELEGRAM_WEBHOOK_URL", "")
+    telegram_webhook_path: str = os.getenv("TELEGRAM_WEBHOOK_PATH", "/tg-webhook")
+    telegram_webhook_secret: str = os.getenv("TELEGRAM_WEBHOOK_SECRET", "")
 
     merchant_api_url_start: str = os.getenv("MERCHANT_API_URL_START", "http://127.0.0.1:8000/zenithion/api/v1/")
+    merchant_api_concurrency: int = int(os.getenv("MERCHANT_API_CONCURRENCY", "50"))
+    polling_tasks_limit: int = int(os.getenv("POLLING_TASKS_LIMIT", "100"))
 
-    try:
-        with open(user_tokens_file, "r", encoding="utf-8") as f:
-            _raw = json.load(f)
-    except Exception:
-        _raw = {}
+    api_tokens: dict[str, list[str]] = {}
+    _user_to_token: dict[str, str] = {}
+    _api_tokens_mtime_ns: Optional[int] = None
 
-    api_tokens: dict[str, list[str]] = {
-        token: [str(x) for x in user_ids]
-        for token, user_ids in (_raw.items() if isinstance(_raw, dict) else [])
-        if isinstance(token, str) and isinstance(user_ids, list)
-    }
+    @classmethod
+    def load_api_tokens(cls) -> None:
+        # reparse the tokens file only when it has changed since the last load
+        try:
+            mtime_ns = os.stat(cls.user_tokens_file).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+
+        if mtime_ns == cls._api_tokens_mtime_ns:
+            return
+
+        # a missing, half-written or broken file keeps the previous tokens; the
+        # mtime is not stored, so the next call retries the load
+        try:
+            raw = orjson.loads(Path(cls.user_tokens_file).read_bytes())
+        except (OSError, orjson.JSONDecodeError) as e:
+            logging.warning(f"Failed to load API tokens from {cls.user_tokens_file}: {e}")
+            return
+
+        cls.api_tokens = {
+            token: [str(x) for x in user_ids]
+            for token, user_ids in (raw.items() if isinstance(raw, dict) else [])
+            if isinstance(token, str) and isinstance(user_ids, list)
+        }
+        # reverse index for per-update lookups; the first token listing a user wins
+        user_to_token: dict[str, str] = {}
+        for token, user_ids in cls.api_tokens.items():
+            for user_id in user_ids:
+                user_to_token.setdefault(user_id, token)
+        cls._user_to_token = user_to_token
+        cls._api_tokens_mtime_ns = mtime_ns
 
     @classmethod
     def get_api_token(cls, user_id: Optional[str]) -> Optional[str]:
         if not user_id:
             return None
 
-        for token, user_ids in cls.api_tokens.items():
-            if user_id in user_ids:
-                return token
+        cls.load_api_tokens()
+        return cls._user_to_token.get(user_id)
 
-        return None
+    @classmethod
+    def get_token_user_ids(cls, token: str) -> list[str]:
+        cls.load_api_tokens()
+        return cls.api_tokens.get(token, [])
 
 
+Config.load_api_tokens()
 config = Config
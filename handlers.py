@@ -1,19 +1,25 @@
+import asyncio
 import decimal
-import json
+import functools
 import logging
 from datetime import datetime
-from typing import Any
-import html
-import re
+from html import escape as _html_escape
+from typing import Any, Awaitable, Callable, TypeVar
 
-from aiogram import Dispatcher, Bot
-from aiogram.exceptions import TelegramBadRequest
+from aiogram import Dispatcher, Bot, F
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
 from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, Message
-from aiohttp import web
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
 
-from callbacks import Cb, is_cb
+try:
+    from ciso8601 import parse_datetime as _parse_dt
+except ImportError:
+    # the C parser is optional, fromisoformat handles the same ISO strings
+    _parse_dt = datetime.fromisoformat
+
+from callbacks import Cb
 from config import config
 from keyboards.inline import get_inline_kb
 from filters import ApiTokenFilter
@@ -23,18 +29,39 @@ from zenithionpay_client import ZenithionPayApiError, get_json, post_json
 
 bot: Bot
 
+HandlerType = TypeVar("HandlerType", bound=Callable[..., Awaitable[None]])
+
 
 _service_unavailable = "Сервис временно недоступен. Попробуйте позже"
 
+# Keyboards are static, so build them once instead of on every reply
+_KB_USER_MENU = get_inline_kb("user_menu")
+_KB_CANCEL = get_inline_kb("cansel")
+_KB_DELETE_MESSAGE = get_inline_kb("delete_message")
+
+# The filter is stateless, one instance serves every registration
+_api_token_filter = ApiTokenFilter()
+
 
 def _format_dt_short(value: Any) -> str:
     if not value:
         return "—"
     if not isinstance(value, str):
         return str(value)
+    return _format_iso_dt_short(value)
+
+
+# Payment lists repeat the same timestamps, parse each distinct string once
+@functools.lru_cache(maxsize=4096)
+def _format_iso_dt_short(value: str) -> str:
+    # ISO dates always start with a 4-digit year; anything else (e.g. an already
+    # formatted "DD.MM HH:MM") is returned as-is without raising inside the parser
+    if not value[:4].isdigit():
+        return value
     try:
-        dt = datetime.fromisoformat(value)
-        return dt.strftime("%d.%m %H:%M")
+        dt = _parse_dt(value)
+        # same as strftime("%d.%m %H:%M") without going through libc strftime
+        return f"{dt.day:02d}.{dt.month:02d} {dt.hour:02d}:{dt.minute:02d}"
     except Exception:
         return value
 
@@ -55,7 +82,19 @@ async def get_merchant_info_text(api_key: str, *, refresh: bool) -> str:
     )
 
 
-_TRON_ADDRESS_RE = re.compile(r"^T[1-9A-HJ-NP-Za-km-z]{33}$")
+_BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_BASE58_CHARS = frozenset(_BASE58_ALPHABET)
+
+
+def _is_tron_address(value: str) -> bool:
+    # "T" is itself a base58 character, so the whole string can be checked at once
+    return len(value) == 34 and value[0] == "T" and _BASE58_CHARS.issuperset(value)
+
+
+def _esc(value: Any) -> str:
+    # Telegram's HTML parse mode only needs &, < and > escaped, quotes can stay
+    return _html_escape(str(value), quote=False)
+
 
 _STATUS_RU: dict[str, str] = {
     "pending": "Ожидает оплаты",
@@ -67,44 +106,74 @@ _STATUS_RU: dict[str, str] = {
 }
 
 
+_status_ru_get = _STATUS_RU.get
+
+
 def _status_ru(status: Any) -> str:
     if not status:
         return "Неизвестно"
+    if isinstance(status, str):
+        # backend statuses are already lowercase, so try them as-is first
+        hit = _status_ru_get(status)
+        return hit if hit is not None else _status_ru_folded(status)
     s = str(status).lower()
-    return _STATUS_RU.get(s, s)
+    return _status_ru_get(s, s)
+
+
+# Other spellings are few and repeat across payments, lowercase each one once
+@functools.lru_cache(maxsize=32)
+def _status_ru_folded(status: str) -> str:
+    s = status.lower()
+    return _status_ru_get(s, s)
 
 
 def _format_payment_block(p: dict[str, Any]) -> str:
-    payment_id = p.get("id", "—")
-    tron_address = p.get("tron_address", "—")
-    status = _status_ru(p.get("status"))
-    created = _format_dt_short(p.get("created_at"))
-    expires = _format_dt_short(p.get("expires_at"))
-
-    amount = p.get("amount", "-")
-    amount_to_pay = p.get("amount_to_pay", "-")
-    amount_paid = p.get("amount_paid", "-")
-
-    lines = [
-        f"<i>ID</i>: <code>{payment_id}</code>",
-        f"<i>Статус</i>: <b>{status}</b>",
-        f"<i>Адрес</i>: <code>{tron_address}</code>",
-        f"<i>Создан</i>: <b>{created}</b>  •  До: <b>{expires}</b>",
-        f"Сумма: <b>{amount}</b>  •  <i>К оплате</i>: <b>{amount_to_pay}</b>  •  <i>Оплачено</i>: <b>{amount_paid}</b>",
-    ]
-    return "\n".join(lines)
+    payment_id = _esc(p.get("id", "—"))
+    tron_address = _esc(p.get("tron_address", "—"))
+    status = _esc(_status_ru(p.get("status")))
+    created = _esc(_format_dt_short(p.get("created_at")))
+    expires = _esc(_format_dt_short(p.get("expires_at")))
+
+    amount = _esc(p.get("amount", "-"))
+    amount_to_pay = _esc(p.get("amount_to_pay", "-"))
+    amount_paid = _esc(p.get("amount_paid", "-"))
+
+    return (
+        f"<i>ID</i>: <code>{payment_id}</code>\n"
+        f"<i>Статус</i>: <b>{status}</b>\n"
+        f"<i>Адрес</i>: <code>{tron_address}</code>\n"
+        f"<i>Создан</i>: <b>{created}</b>  •  До: <b>{expires}</b>\n"
+        f"Сумма: <b>{amount}</b>  •  <i>К оплате</i>: <b>{amount_to_pay}</b>  •  <i>Оплачено</i>: <b>{amount_paid}</b>"
+    )
+
+
+_CLOSED_PAYMENT_TEXT = 'Платеж <b>закрыт</b>'
+
+
+def _format_deposit_line(d: dict[str, Any]) -> str:
+    d_id = d.get("id", "—")
+    d_created = _format_dt_short(d.get("created_at"))
+    d_amount = d.get("amount", "—")
+    d_txid = d.get("txid", "—")
+    return (
+        "• "
+        f"<i>ID</i>: <code>{_esc(d_id)}</code>  •  "
+        f"  ⏱️: <b>{_esc(d_created)}</b>\n"
+        f"  💵: <b>{_esc(d_amount)} USDT</b>\n"
+        f"  <i>TXID</i>: <code>{_esc(d_txid)}</code>"
+    )
 
 
 def _format_payment_details(p: dict[str, Any]) -> str:
     if p.get("status") == 'closed':
-        return 'Платеж <b>закрыт</b>'
+        return _CLOSED_PAYMENT_TEXT
 
-    payment_id = p.get("id", "—")
-    tron_address = p.get("tron_address", "—")
-    status = _status_ru(p.get("status"))
+    payment_id = _esc(p.get("id", "—"))
+    tron_address = _esc(p.get("tron_address", "—"))
+    status = _esc(_status_ru(p.get("status")))
 
-    created = _format_dt_short(p.get("created_at"))
-    expires = _format_dt_short(p.get("expires_at"))
+    created = _esc(_format_dt_short(p.get("created_at")))
+    expires = _esc(_format_dt_short(p.get("expires_at")))
 
     amount = p.get("amount", None)
     amount_to_pay = p.get("amount_to_pay", None)
@@ -112,36 +181,23 @@ def _format_payment_details(p: dict[str, Any]) -> str:
 
     metadata = p.get("metadata", None)
     if isinstance(metadata, dict) and metadata:
-        metadata_text = ", ".join(f"{k}={v}" for k, v in metadata.items())
+        metadata_text = _esc(", ".join(f"{k}={v}" for k, v in metadata.items()))
     elif metadata is None:
         metadata_text = "—"
     else:
-        metadata_text = str(metadata)
+        metadata_text = _esc(metadata)
 
     deposits = p.get("deposits", None)
-    deposits_lines: list[str] = []
-    if isinstance(deposits, list) and deposits:
-        for d in deposits:
-            if not isinstance(d, dict):
-                continue
-            d_id = d.get("id", "—")
-            d_created = _format_dt_short(d.get("created_at"))
-            d_amount = d.get("amount", "—")
-            d_address = d.get("address", "—")
-            d_txid = d.get("txid", "—")
-            deposits_lines.append(
-                "• "
-                f"<i>ID</i>: <code>{html.escape(str(d_id))}</code>  •  "
-                f"  ⏱️: <b>{html.escape(str(d_created))}</b>\n"
-                f"  💵: <b>{html.escape(str(d_amount))} USDT</b>\n"
-                f"  <i>TXID</i>: <code>{html.escape(str(d_txid))}</code>"
-            )
+    if not isinstance(deposits, list):
+        deposits = []
+    deposits_lines = [_format_deposit_line(d) for d in deposits if isinstance(d, dict)]
+
+    # backslashes are not allowed inside f-string expressions before Python 3.12
+    amount_line = f"<i>Сумма</i>: <b>{_esc(amount)}</b>\n" if amount is not None else ""
+    amount_to_pay_line = f"<i>К оплате</i>: <b>{_esc(amount_to_pay)}</b>\n" if amount_to_pay is not None else ""
+    amount_paid_line = f"<i>Оплачено</i>: <b>{_esc(amount_paid)}</b>\n" if amount_paid is not None else ""
     deposits_text = "\n".join(deposits_lines) if deposits_lines else "—"
 
-    sum_for_paying_line = f"<i>Сумма</i>: <b>{amount}</b>\n" if amount is not None else ""
-    amount_to_pay_line = f"<i>К оплате</i>: <b>{amount_to_pay}</b>" if amount_to_pay is not None else ""
-    paid_line = f"<i>Оплачено</i>: <b>{amount_paid}</b>" if amount_paid is not None else ""
-
     return (
         "<b>Платёж</b>\n"
         f"<i>ID</i>: <code>{payment_id}</code>\n"
@@ -149,29 +205,75 @@ def _format_payment_details(p: dict[str, Any]) -> str:
         f"<i>Адрес</i>: <code>{tron_address}</code>\n"
         f"⏱️ <i>Создан</i>: <b>{created}</b>\n"
         f"⌛️ <i>Истекает</i>: <b>{expires}</b>\n"
-        f"{sum_for_paying_line}"
-        f"{amount_to_pay_line}"
-        f"{paid_line}\n"
+        f"{amount_line}{amount_to_pay_line}{amount_paid_line}"
         f"<i>Метаданные</i>: <code>{metadata_text}</code>\n\n"
         f"📥 <b>Депозиты ({len(deposits)})</b>\n"
         f"{deposits_text}"
     )
 
 
-async def start_handler(message: Message, api_key: str) -> None:
+async def _delete_message(message: Message) -> None:
     try:
-        text = await get_merchant_info_text(api_key, refresh=False)
-    except ZenithionPayApiError as e:
-        if e.status >= 500:
-            await message.answer(_service_unavailable, reply_markup=get_inline_kb("user_menu"))
-        else:
-            await message.answer(f"Ошибка запроса", reply_markup=get_inline_kb("user_menu"))
-        return
-    except Exception:
-        await message.answer(_service_unavailable, reply_markup=get_inline_kb("user_menu"))
-        return
+        await message.delete()
+    except TelegramBadRequest as e:
+        logging.warning("Failed to delete message: %s", e)
+
+
+async def _answer_and_delete(message: Message, text: str, **kwargs: Any) -> None:
+    # the reply and the deletion of the old message don't depend on each other
+    await asyncio.gather(message.answer(text, **kwargs), _delete_message(message))
+
+
+def _handle_api_errors(
+    reply_markup: InlineKeyboardMarkup | None = None,
+    *,
+    detailed: bool = False,
+    clear_state: bool = False,
+    toast: bool = False,
+) -> Callable[[HandlerType], HandlerType]:
+    # Replies to the user when a merchant API call inside the handler fails:
+    # detailed - show status and payload for 4xx errors, clear_state - reset the FSM state,
+    # toast - answer the callback query instead of sending a message.
+    # Telegram API errors are not caught and propagate as usual.
+    def decorator(handler: HandlerType) -> HandlerType:
+        @functools.wraps(handler)
+        async def wrapper(event: Message | CallbackQuery, *args: Any, **kwargs: Any) -> None:
+            try:
+                await handler(event, *args, **kwargs)
+                return
+            except TelegramAPIError:
+                raise
+            except ZenithionPayApiError as e:
+                if e.status >= 500:
+                    text = _service_unavailable
+                elif detailed:
+                    text = f"Ошибка запроса: {e.status}\nОтвет:\n{_esc(e.payload)}"
+                else:
+                    text = "Ошибка запроса"
+            except Exception:
+                logging.exception("Handler %s failed", handler.__name__)
+                text = _service_unavailable
+
+            if clear_state and kwargs.get("state") is not None:
+                await kwargs["state"].clear()
+
+            if isinstance(event, CallbackQuery):
+                if toast or not event.message:
+                    await event.answer(text)
+                else:
+                    await event.message.answer(text, reply_markup=reply_markup)
+            else:
+                await event.answer(text, reply_markup=reply_markup)
+
+        return wrapper
+
+    return decorator
 
-    await message.answer(text, reply_markup=get_inline_kb("user_menu"))
+
+@_handle_api_errors(_KB_USER_MENU)
+async def start_handler(message: Message, api_key: str) -> None:
+    text = await get_merchant_info_text(api_key, refresh=False)
+    await message.answer(text, reply_markup=_KB_USER_MENU)
 
 
 async def delete_message_callback(callback: CallbackQuery) -> None:
@@ -180,191 +282,160 @@ async def delete_message_callback(callback: CallbackQuery) -> None:
         await callback.message.delete()
 
 
+@_handle_api_errors(_KB_USER_MENU)
 async def cancel_callback(callback: CallbackQuery, state: FSMContext, api_key) -> None:
     await state.clear()
     # if callback.message:
     #     await callback.message.delete()
-    try:
-        text = await get_merchant_info_text(api_key, refresh=False)
-    except ZenithionPayApiError as e:
-        if e.status >= 500:
-            await callback.message.answer(_service_unavailable, reply_markup=get_inline_kb("user_menu"))
-        else:
-            await callback.message.answer(f"Ошибка запроса", reply_markup=get_inline_kb("user_menu"))
-        return
-    except Exception:
-        await callback.message.answer(_service_unavailable, reply_markup=get_inline_kb("user_menu"))
-        return
-
-    await callback.message.answer(text, reply_markup=get_inline_kb("user_menu"))
-    await callback.message.delete()
+    text = await get_merchant_info_text(api_key, refresh=False)
+    await _answer_and_delete(callback.message, text, reply_markup=_KB_USER_MENU)
 
 
+@_handle_api_errors(toast=True)
 async def info_callback(callback: CallbackQuery, api_key: str) -> None:
-    try:
-        text = await get_merchant_info_text(api_key, refresh=True)
-    except ZenithionPayApiError as e:
-        if e.status >= 500:
-            await callback.answer(_service_unavailable, reply_markup=get_inline_kb("user_menu"))
-        else:
-            await callback.answer(f"Ошибка запроса", reply_markup=get_inline_kb("user_menu"))
-        return
-    except Exception:
-        await callback.answer(_service_unavailable, reply_markup=get_inline_kb("user_menu"))
-        return
+    text = await get_merchant_info_text(api_key, refresh=True)
 
     try:
         await callback.message.edit_text(
             text,
-            reply_markup=get_inline_kb("user_menu")
+            reply_markup=_KB_USER_MENU
         )
     except TelegramBadRequest:
         pass
     await callback.answer('Данные обновлены.')
 
 
+@_handle_api_errors(detailed=True)
 async def payments_history_callback(callback: CallbackQuery, api_key: str) -> None:
     await callback.answer()
 
-    try:
-        response_data = await get_json(
-            "payments/history",
-            {"X-API-Key": api_key},
-            params={'limit': 10, 'with_closed': False},
-            cache_ttl=10
-        )
-    except ZenithionPayApiError as e:
-        if e.status >= 500:
-            await callback.message.answer(_service_unavailable)
-            return
-        await callback.message.answer(f"Ошибка запроса: {e.status}\nОтвет:\n{e.payload}")
-        return
-    except Exception:
-        await callback.message.answer(_service_unavailable)
-        return
+    response_data = await get_json(
+        "payments/history",
+        {"X-API-Key": api_key},
+        params={'limit': 10, 'with_closed': False},
+        cache_ttl=10
+    )
 
     payments = response_data.get("payments") if isinstance(response_data, dict) else None
     if not isinstance(payments, list) or not payments:
         await callback.message.answer("Платежи не найдены.")
         return
 
-    blocks: list[str] = []
-    for item in payments:
-        if isinstance(item, dict):
-            blocks.append(_format_payment_block(item))
+    blocks = [_format_payment_block(item) for item in payments if isinstance(item, dict)]
+    if not blocks:
+        blocks = ["Платежи не найдены."]
 
-    text = f"Последние {response_data.get('count', '?')} платежей (Без закрытых):\n\n"
-    block_text = "\n\n".join(blocks) if blocks else "Платежи не найдены."
-    text += block_text
-    await callback.message.answer(f"{text}", reply_markup=get_inline_kb("cansel"))
-    await callback.message.delete()
+    # header and blocks are joined in one pass
+    text = "\n\n".join([f"Последние {response_data.get('count', '?')} платежей (Без закрытых):", *blocks])
+    await _answer_and_delete(callback.message, text, reply_markup=_KB_CANCEL)
 
 
 async def check_payment_callback(callback: CallbackQuery, state: FSMContext) -> None:
     await callback.answer()
     await state.set_state(PaymentCheckState.waiting_for_payment_id_or_address)
-    await callback.message.answer(
+    await _answer_and_delete(
+        callback.message,
         "Отправь <b>ID платежа</b> или <b>TRON-адрес</b>.\n"
         "Пример: <code>7747b8f0-6970-4f38-bcfd-95e6560e49db</code>",
-        reply_markup=get_inline_kb("cansel"),
+        reply_markup=_KB_CANCEL,
     )
-    await callback.message.delete()
 
 
+@_handle_api_errors(_KB_CANCEL, clear_state=True)
 async def check_payment_input(message: Message, state: FSMContext, api_key: str) -> None:
-    await message.delete()
-
     value = (message.text or "").strip()
     if not value:
-        await message.answer("Пришли ID или адрес одним сообщением.", reply_markup=get_inline_kb("delete_message"))
+        await _answer_and_delete(message, "Пришли ID или адрес одним сообщением.", reply_markup=_KB_DELETE_MESSAGE)
         return
 
     try:
-        payload = await get_json(
-            f"payments/{value}",
-            {"X-API-Key": api_key},
-            cache_ttl=10
+        # the user's message is deleted while the payment is being fetched
+        _, payload = await asyncio.gather(
+            _delete_message(message),
+            get_json(
+                f"payments/{value}",
+                {"X-API-Key": api_key},
+                cache_ttl=10
+            ),
         )
     except ZenithionPayApiError as e:
-        if e.status == 404:
-            await message.answer(f"Платеж <b>{value}</b> не найден. Попробуйте еще раз.",
-                                 reply_markup=get_inline_kb("cansel"))
-        else:
-            await message.answer(_service_unavailable, reply_markup=get_inline_kb("cansel"))
-            await state.clear()
-        return
-    except Exception:
-        await message.answer(_service_unavailable, reply_markup=get_inline_kb("cansel"))
-        await state.clear()
+        if e.status != 404:
+            raise
+        # the state is kept so the user can send another ID right away
+        await message.answer(f"Платеж <b>{_esc(value)}</b> не найден. Попробуйте еще раз.",
+                             reply_markup=_KB_CANCEL)
         return
 
-    text = _format_payment_details(payload) if isinstance(payload, dict) else str(payload)
-    await message.answer(text, reply_markup=get_inline_kb("delete_message"))
+    if not isinstance(payload, dict):
+        text = str(payload)
+    elif payload.get("status") == "closed":
+        # old payments are mostly closed, no need to format the full card
+        text = _CLOSED_PAYMENT_TEXT
+    else:
+        text = _format_payment_details(payload)
+    await message.answer(text, reply_markup=_KB_DELETE_MESSAGE)
     await state.clear()
 
 
 async def withdraw_callback(callback: CallbackQuery, state: FSMContext) -> None:
     await callback.answer()
     await state.set_state(WithdrawState.waiting_for_to_address)
-    await callback.message.answer(
+    await _answer_and_delete(
+        callback.message,
         "Введите <b>адрес на который совершится вывод</b> USDT TRC-20 (TRON-адрес).",
-        reply_markup=get_inline_kb("cansel"),
+        reply_markup=_KB_CANCEL,
     )
-    await callback.message.delete()
 
 
+@_handle_api_errors(_KB_CANCEL, detailed=True, clear_state=True)
 async def withdraw_input(message: Message, state: FSMContext, api_key: str) -> None:
     to_address = (message.text or "").strip()
 
-    if not _TRON_ADDRESS_RE.fullmatch(to_address):
+    if not _is_tron_address(to_address):
         await message.answer(
             "Неправильный адрес TRON.\n"
             "Пример формата: <b>TKTgEtjonYPdCWDs7bUb9dUUwYikceDabx</b>\n"
             "Отправь адрес ещё раз.",
-            reply_markup=get_inline_kb("cansel"),
+            reply_markup=_KB_CANCEL,
         )
         return
 
-    try:
-        payload = await post_json(
-            "merchant/balance/withdraw",
-            {"X-API-Key": api_key},
-            json_body={"to_address": to_address},
-        )
-    except ZenithionPayApiError as e:
-        if e.status >= 500:
-            await message.answer(_service_unavailable, reply_markup=get_inline_kb("cansel"))
-        else:
-            await message.answer(f"Ошибка запроса: {e.status}\nОтвет:\n{e.payload}",
-                                 reply_markup=get_inline_kb("cansel"))
-        await state.clear()
-        return
-    except Exception:
-        await message.answer(_service_unavailable, reply_markup=get_inline_kb("cansel"))
-        await state.clear()
-        return
+    payload = await post_json(
+        "merchant/balance/withdraw",
+        {"X-API-Key": api_key},
+        json_body={"to_address": to_address},
+    )
 
     withdraw_fail_text = f"❌ Не удалось выполнить вывод. Обратитесь в техподдержку."
 
     if isinstance(payload, dict):
         success = payload.get("success") is True
         if success:
-            await message.answer(f"✅ Вывод успешно создан. Ожидайте пополнение на {to_address} <b>(не дольше часа)</b>.", reply_markup=get_inline_kb("delete_message"))
+            text = f"✅ Вывод успешно создан. Ожидайте пополнение на {to_address} <b>(не дольше часа)</b>."
         else:
             status = payload.get("status")
             if status == 'under_minimum_withdrawal_amount':
-                await message.answer('❕ Сумма к выводу меньше допустимого минимума. Совершайте вывод когда сумма будет превышать порог.', reply_markup=get_inline_kb("delete_message"))
+                text = '❕ Сумма к выводу меньше допустимого минимума. Совершайте вывод когда сумма будет превышать порог.'
             else:
-                await message.answer(withdraw_fail_text, reply_markup=get_inline_kb("delete_message"))
+                text = withdraw_fail_text
     else:
-        await message.answer(withdraw_fail_text, reply_markup=get_inline_kb("delete_message"))
+        text = withdraw_fail_text
 
     await state.clear()
-    await message.delete()
+    await _answer_and_delete(message, text, reply_markup=_KB_DELETE_MESSAGE)
+
+
+# Keeps deposit broadcasts under Telegram's per-bot rate limit
+_notify_semaphore = asyncio.Semaphore(20)
+
+
+async def _send_admin_notification(admin_id: str, text: str) -> None:
+    async with _notify_semaphore:
+        await bot.send_message(admin_id, text)
 
 
 async def new_deposit_notify(address: str, amount: decimal.Decimal, new_status: str, merchant_api_token: str) -> None:
-    admins_ids = config.api_tokens.get(merchant_api_token, [])
+    admins_ids = config.get_token_user_ids(merchant_api_token)
 
     if not admins_ids:
         logging.warning(f"Merchant API token not found: {merchant_api_token}")
@@ -373,20 +444,39 @@ async def new_deposit_notify(address: str, amount: decimal.Decimal, new_status:
     text = f'''
 💸 Новый депозит.
 
-Адрес: <code><b>{address}</b></code>
-Сумма: <b><i>{amount}</i></b>
+Адрес: <code><b>{_esc(address)}</b></code>
+Сумма: <b><i>{_esc(amount)}</i></b>
 
-Статус платежа: {_status_ru(new_status)}
+Статус платежа: {_esc(_status_ru(new_status))}
 '''
 
-    for admin_id in admins_ids:
-        try:
-            await bot.send_message(admin_id, text)
-        except TelegramBadRequest as e:
-            logging.warning(f"Failed to send message to admin: {e}",)
+    results = await asyncio.gather(
+        *(_send_admin_notification(admin_id, text) for admin_id in admins_ids),
+        return_exceptions=True,
+    )
+    for admin_id, result in zip(admins_ids, results):
+        if isinstance(result, Exception):
+            logging.warning(f"Failed to send message to admin {admin_id}: {result}")
     logging.info(f"New deposit notifications sent.")
 
 
+# Menu buttons are routed by a single dict lookup instead of a chain of filters.
+# CallableObject passes each handler only the arguments it declares.
+_MENU_CALLBACK_ROUTES: dict[str, CallableObject] = {
+    Cb.BACK_TO_USER_MENU: CallableObject(cancel_callback),
+    Cb.BALANCE: CallableObject(info_callback),
+    Cb.PAYMENTS_LAST: CallableObject(payments_history_callback),
+    Cb.WITHDRAW: CallableObject(withdraw_callback),
+    Cb.CHECK_PAYMENT: CallableObject(check_payment_callback),
+}
+
+
+async def menu_callback_router(callback: CallbackQuery, **kwargs: Any) -> None:
+    route = _MENU_CALLBACK_ROUTES.get(callback.data)
+    if route is not None:
+        await route.call(callback, **kwargs)
+
+
 def register_handlers(dp: Dispatcher, actual_bot: Bot) -> None:
     global bot
     bot = actual_bot
@@ -394,44 +484,24 @@ def register_handlers(dp: Dispatcher, actual_bot: Bot) -> None:
     dp.message.register(
         start_handler,
         CommandStart(),
-        ApiTokenFilter(),
+        _api_token_filter,
     )
     dp.callback_query.register(
         delete_message_callback,
-        lambda c: is_cb(c.data, Cb.DELETE_MESSAGE),
-    )
-    dp.callback_query.register(
-        cancel_callback,
-        lambda c: is_cb(c.data, Cb.BACK_TO_USER_MENU),
-        ApiTokenFilter(),
-    )
-    dp.callback_query.register(
-        info_callback,
-        lambda c: is_cb(c.data, Cb.BALANCE),
-        ApiTokenFilter(),
-    )
-    dp.callback_query.register(
-        payments_history_callback,
-        lambda c: is_cb(c.data, Cb.PAYMENTS_LAST),
-        ApiTokenFilter(),
-    )
-    dp.callback_query.register(
-        withdraw_callback,
-        lambda c: is_cb(c.data, Cb.WITHDRAW),
-        ApiTokenFilter(),
+        F.data == Cb.DELETE_MESSAGE,
     )
     dp.callback_query.register(
-        check_payment_callback,
-        lambda c: is_cb(c.data, Cb.CHECK_PAYMENT),
-        ApiTokenFilter(),
+        menu_callback_router,
+        F.data.in_(_MENU_CALLBACK_ROUTES),
+        _api_token_filter,
     )
     dp.message.register(
         withdraw_input,
         WithdrawState.waiting_for_to_address,
-        ApiTokenFilter(),
+        _api_token_filter,
     )
     dp.message.register(
         check_payment_input,
         PaymentCheckState.waiting_for_payment_id_or_address,
-        ApiTokenFilter(),
+        _api_token_filter,
     )
@@ -39,15 +39,16 @@ def cancel_kb() -> InlineKeyboardMarkup:
 InlineKbFactory = Callable[..., InlineKeyboardMarkup]
 InlineKbEntry = Union[InlineKeyboardMarkup, InlineKbFactory]
 
+# Static keyboards are built once; factories are kept for keyboards that take kwargs
 INLINE_KEYBOARDS: Dict[str, InlineKbEntry] = {
-    "user_menu": user_menu_kb,
-    "delete_message": delete_message_kb,
-    "cansel": cancel_kb,
+    "user_menu": user_menu_kb(),
+    "delete_message": delete_message_kb(),
+    "cansel": cancel_kb(),
 }
 
 
 def get_inline_kb(name: str, **kwargs: Any) -> InlineKeyboardMarkup:
     entry = INLINE_KEYBOARDS[name]
-    if callable(entry):
-        return entry(**kwargs)
-    return entry
\ No newline at end of file
+    if isinstance(entry, InlineKeyboardMarkup):
+        return entry
+    return entry(**kwargs)
\ No newline at end of file
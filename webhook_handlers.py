@@ -1,26 +1,48 @@
+import asyncio
+import hmac
 import logging
 
+import orjson
 from aiohttp import web
 
 from config import config
 from handlers import new_deposit_notify
 
 
+_webhooks_api_key = (config.webhooks_api_key or "").encode("utf-8")
+
+
+async def _handle_webhook_event(event: dict) -> None:
+    if event.get("message", "") == "new_deposit":
+        await new_deposit_notify(event['address'], event['amount'], event['new_status'], event['merchant_api_token'])
+
+
 async def handle_payment_webhook(request):
     try:
-        data = await request.json()
+        data = orjson.loads(await request.read())
 
         logging.info(f"Payment webhook: {data}")
 
         api_key = request.headers.get("X-API-Key")
 
-        if not api_key or (api_key and api_key != config.webhooks_api_key):
+        # constant-time comparison; an unset WEBHOOK_API_KEY rejects every request
+        if not api_key or not _webhooks_api_key or not hmac.compare_digest(api_key.encode("utf-8"), _webhooks_api_key):
             return web.Response(text="Unauthorized", status=403)
 
-        if data.get("message", "") == "new_deposit":
-            await new_deposit_notify(data['address'], data['amount'], data['new_status'], data['merchant_api_token'])
+        # a batch comes as {"events": [...]}, a single event is the payload itself
+        events = data.get("events")
+        if not isinstance(events, list):
+            await _handle_webhook_event(data)
+            return web.Response(text="Success", status=200)
+
+        # other events of the batch are already notified, so a retry on 400 would
+        # duplicate them: failures are only logged and the batch is acknowledged
+        results = await asyncio.gather(*(_handle_webhook_event(e) for e in events), return_exceptions=True)
+        for e in results:
+            if isinstance(e, Exception):
+                logging.error(f"Webhook event error: {e!r}")
 
         return web.Response(text="Success", status=200)
     except Exception as e:
         logging.error(f"Webhook error: {e}")
-        return web.Response(text="Error", status=400)
\ No newline at end of file
+        return web.Response(text="Error", status=400)
@@ -1,16 +1,15 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import functools
 import logging
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
-import ssl
-import socket
 from typing import Any
 
+import aiohttp
+import orjson
+
 from config import config
 
 
@@ -18,6 +17,8 @@ logger = logging.getLogger("zenithionpay_client")
 
 
 class ZenithionPayApiError(Exception):
+    __slots__ = ("status", "payload", "url")
+
     def __init__(self, status: int, payload: Any, url: str) -> None:
         self.status = status
         self.payload = payload
@@ -25,9 +26,16 @@ class ZenithionPayApiError(Exception):
         super().__init__(f"ZenithionPay API error {status} for {url}: {payload}")
 
 
+# One keep-alive connection pool for all merchant API calls
+_session: aiohttp.ClientSession | None = None
+# Bounds concurrent merchant API calls; waiting here does not count against the
+# request timeout, unlike waiting for a free connection in the pool
+_REQUEST_SEMAPHORE = asyncio.Semaphore(config.merchant_api_concurrency)
+
 # Простой in-memory кэш только для GET JSON (на процесс)
 _GET_JSON_CACHE: dict[tuple[str, str], tuple[float, Any]] = {}
-_GET_JSON_LOCKS: dict[tuple[str, str], asyncio.Lock] = {}
+# GET requests in flight: concurrent callers with the same key await one upstream call
+_GET_JSON_INFLIGHT: dict[tuple[str, str], asyncio.Task] = {}
 
 
 def _cache_key_for_get(url: str, headers: dict[str, str]) -> tuple[str, str]:
@@ -35,7 +43,29 @@ def _cache_key_for_get(url: str, headers: dict[str, str]) -> tuple[str, str]:
     return url, api_key
 
 
-def _http_request_json(
+def get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=config.merchant_api_concurrency,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+                ssl=not config.skip_verify,
+            ),
+            timeout=aiohttp.ClientTimeout(total=10),
+        )
+    return _session
+
+
+async def close_session() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def _request_json(
     method: str,
     url: str,
     headers: dict[str, str],
@@ -43,37 +73,31 @@ def _http_request_json(
     json_body: Any | None = None,
 ) -> tuple[int, Any]:
     data = None
-    req_headers = dict(headers or {})
-
     if json_body is not None:
-        data = json.dumps(json_body).encode("utf-8")
-        req_headers.setdefault("Content-Type", "application/json; charset=utf-8")
-
-    req = urllib.request.Request(url, method=method.upper(), headers=req_headers, data=data)
-
-    skip_verify = True
-    ssl_context = None
-    if url.lower().startswith("https://"):
-        ssl_context = ssl._create_unverified_context() if skip_verify else ssl.create_default_context()
+        data = orjson.dumps(json_body)
+        if "Content-Type" not in headers:
+            headers = {**headers, "Content-Type": "application/json; charset=utf-8"}
 
     try:
-        with urllib.request.urlopen(req, timeout=timeout, context=ssl_context) as resp:
+        async with _REQUEST_SEMAPHORE, get_session().request(
+            method,
+            url,
+            headers=headers,
+            data=data,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as resp:
             status = resp.status
-            body = resp.read().decode("utf-8", errors="replace")
-    except urllib.error.HTTPError as e:
-        status = getattr(e, "code", 0) or 0
-        body = e.read().decode("utf-8", errors="replace") if hasattr(e, "read") else ""
-    except (TimeoutError, socket.timeout):
-        status = 503
-        body = json.dumps({"error": "timeout"})
-    except urllib.error.URLError as e:
-        status = 503
-        body = json.dumps({"error": "network_error", "reason": str(getattr(e, "reason", e))})
+            body = await resp.read()
+    except asyncio.TimeoutError:
+        return 503, {"error": "timeout"}
+    except aiohttp.ClientError as e:
+        return 503, {"error": "network_error", "reason": str(e)}
 
+    # the body stays bytes for the JSON parser and is decoded only for the text fallback
     try:
-        return status, json.loads(body)
-    except Exception:
-        return status, body
+        return status, orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return status, body.decode("utf-8", errors="replace")
 
 
 def _join_url(base: str, endpoint: str) -> str:
@@ -88,6 +112,42 @@ def _with_query_params(url: str, params: dict[str, Any] | None) -> str:
     return f"{url}?{urllib.parse.urlencode(params, doseq=True)}"
 
 
+async def _fetch_get_json(
+    url: str,
+    headers: dict[str, str],
+    timeout: float,
+    cache_key: tuple[str, str],
+    cache_ttl: float,
+) -> Any:
+    started = time.perf_counter()
+
+    try:
+        status, payload = await _request_json("GET", url, headers, timeout)
+    except Exception:
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        # the traceback is only formatted when debug logging is on
+        logger.warning("GET %s failed (%.1f ms)", url, elapsed_ms, exc_info=logger.isEnabledFor(logging.DEBUG))
+        raise
+
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+    if 200 <= int(status) <= 299:
+        logger.info("GET %s -> %s (%.1f ms)", url, status, elapsed_ms)
+        if cache_ttl > 0:
+            _GET_JSON_CACHE[cache_key] = (time.time(), payload)
+        return payload
+
+    logger.warning("GET %s -> %s (%.1f ms), payload=%r", url, status, elapsed_ms, payload)
+    raise ZenithionPayApiError(status=int(status), payload=payload, url=url)
+
+
+def _forget_inflight_get(cache_key: tuple[str, str], task: asyncio.Task) -> None:
+    _GET_JSON_INFLIGHT.pop(cache_key, None)
+    if not task.cancelled():
+        # waiters re-raise the error themselves, this only marks it as retrieved
+        task.exception()
+
+
 async def get_json(
     endpoint: str,
     headers: dict[str, str],
@@ -101,47 +161,26 @@ async def get_json(
     started = time.perf_counter()
 
     cache_key = _cache_key_for_get(url, headers)
-    now = time.time()
 
     if not refresh and cache_ttl > 0:
         cached = _GET_JSON_CACHE.get(cache_key)
         if cached is not None:
             saved_at, payload = cached
-            if (now - saved_at) <= cache_ttl:
+            if (time.time() - saved_at) <= cache_ttl:
                 elapsed_ms = (time.perf_counter() - started) * 1000.0
                 logger.info("GET %s -> cache (%.1f ms)", url, elapsed_ms)
                 return payload
 
-    lock = _GET_JSON_LOCKS.setdefault(cache_key, asyncio.Lock())
-    async with lock:
-        # re-checking after waiting for lock
-        now = time.time()
-        if not refresh and cache_ttl > 0:
-            cached = _GET_JSON_CACHE.get(cache_key)
-            if cached is not None:
-                saved_at, payload = cached
-                if (now - saved_at) <= cache_ttl:
-                    elapsed_ms = (time.perf_counter() - started) * 1000.0
-                    logger.info("GET %s -> cache (%.1f ms)", url, elapsed_ms)
-                    return payload
-
-        try:
-            status, payload = await asyncio.to_thread(_http_request_json, "GET", url, headers, timeout, None)
-        except Exception:
-            elapsed_ms = (time.perf_counter() - started) * 1000.0
-            logger.exception("GET %s failed (%.1f ms)", url, elapsed_ms)
-            raise
-
-        elapsed_ms = (time.perf_counter() - started) * 1000.0
-
-        if 200 <= int(status) <= 299:
-            logger.info("GET %s -> %s (%.1f ms)", url, status, elapsed_ms)
-            if cache_ttl > 0:
-                _GET_JSON_CACHE[cache_key] = (time.time(), payload)
-            return payload
+    task = _GET_JSON_INFLIGHT.get(cache_key)
+    if task is None:
+        task = asyncio.create_task(_fetch_get_json(url, headers, timeout, cache_key, cache_ttl))
+        _GET_JSON_INFLIGHT[cache_key] = task
+        task.add_done_callback(functools.partial(_forget_inflight_get, cache_key))
+    else:
+        logger.debug("GET %s -> waiting for in-flight request", url)
 
-        logger.warning("GET %s -> %s (%.1f ms), payload=%r", url, status, elapsed_ms, payload)
-        raise ZenithionPayApiError(status=int(status), payload=payload, url=url)
+    # shielded, so a cancelled caller does not abort the request others are waiting on
+    return await asyncio.shield(task)
 
 
 async def post_json(
@@ -155,10 +194,11 @@ async def post_json(
     started = time.perf_counter()
 
     try:
-        status, payload = await asyncio.to_thread(_http_request_json, "POST", url, headers, timeout, json_body)
+        status, payload = await _request_json("POST", url, headers, timeout, json_body)
     except Exception:
         elapsed_ms = (time.perf_counter() - started) * 1000.0
-        logger.exception("POST %s failed (%.1f ms)", url, elapsed_ms)
+        # the traceback is only formatted when debug logging is on
+        logger.warning("POST %s failed (%.1f ms)", url, elapsed_ms, exc_info=logger.isEnabledFor(logging.DEBUG))
         raise
 
     elapsed_ms = (time.perf_counter() - started) * 1000.0